@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_pymongo import PyMongo
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.security import hash_password, check_password
 
 auth_blueprint = Blueprint('auth', __name__)
 
@@ -22,7 +22,7 @@ def register():
     if mongo.db.users.find_one({"email": email}):
         return jsonify({"message": "User already exists"}), 409
 
-    hashed_password = generate_password_hash(password)
+    hashed_password = hash_password(password)
     mongo.db.users.insert_one({"email": email, "password": hashed_password})
 
     return jsonify({"message": "User registered successfully"}), 201
@@ -34,7 +34,7 @@ def login():
     password = data.get('password')
 
     user = mongo.db.users.find_one({"email": email})
-    if user and check_password_hash(user['password'], password):
+    if user and check_password(user['password'], password):
         return jsonify({"message": "Login successful"}), 200
     return jsonify({"message": "Invalid email or password"}), 401
 
@@ -48,7 +48,7 @@ def verify_password():
         return jsonify({"message": "Email and password required"}), 400
 
     user = mongo.db.users.find_one({"email": email})
-    if user and check_password_hash(user['password'], password):
+    if user and check_password(user['password'], password):
         return jsonify({"message": "Password verified"}), 200
     return jsonify({"message": "Incorrect password"}), 401
 
@@ -65,7 +65,7 @@ def change_password():
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    hashed_password = generate_password_hash(new_password)
+    hashed_password = hash_password(new_password)
 
     result = mongo.db.users.update_one(
         {"email": email}, 
@@ -0,0 +1,40 @@
+from flask import Blueprint, Response, request, jsonify, current_app
+from utils.profiler import verify_profile_token, PROFILE_TOKEN_HEADER
+
+profiling_bp = Blueprint('profiling', __name__)
+
+@profiling_bp.before_request
+def require_admin_token():
+    # CORS preflights never carry the token; let Flask answer them
+    if request.method == 'OPTIONS':
+        return
+    if not verify_profile_token(
+        current_app.config.get('PROFILE_ADMIN_SECRET'),
+        request.headers.get(PROFILE_TOKEN_HEADER)
+    ):
+        return jsonify({'error': 'Invalid or missing admin token'}), 403
+
+@profiling_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    return jsonify({'profiles': current_app.profile_store.list_profiles()}), 200
+
+@profiling_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    profile = current_app.profile_store.get_profile(profile_id)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile), 200
+
+@profiling_bp.route('/admin/profiles/<profile_id>/flamegraph', methods=['GET'])
+def download_flamegraph(profile_id):
+    profile = current_app.profile_store.get_profile(profile_id)
+    stacks = current_app.profile_store.get_folded_stacks(profile_id)
+    if not profile or stacks is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if not profile.get('sampled'):
+        return jsonify({'error': 'Request was not sampled, no stack profile was captured'}), 409
+    return Response(
+        stacks,
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename={profile_id}.folded'}
+    )
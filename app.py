@@ -2,7 +2,10 @@ from flask import Flask
 from flask_cors import CORS
 from api.auth import auth_blueprint, init_mongo
 from api.connections import connections_bp
+from api.profiling import profiling_bp
 from service.user_service import UserService
+from service.profile_service import ProfileStore
+from utils.profiler import init_profiler
 import os
 
 def create_app():
@@ -14,6 +17,18 @@ def create_app():
     # Configure JWT
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 3600  # 1 hour
+
+    # Configure request profiling
+    app.config['PROFILE_ADMIN_SECRET'] = os.getenv('PROFILE_ADMIN_SECRET')
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # fraction of requests
+    app.config['PROFILE_SAMPLE_INTERVAL_MS'] = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+    app.config['PROFILE_SLOW_THRESHOLD_MS'] = float(os.getenv('PROFILE_SLOW_THRESHOLD_MS', 1000))
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', '/tmp/flask_backend_profiles')
+    app.config['PROFILE_MAX_ENTRIES'] = int(os.getenv('PROFILE_MAX_ENTRIES', 100))
+
+    # Initialize profiling (must come before any Mongo client is created)
+    init_profiler(app)
+    app.profile_store = ProfileStore(app.config['PROFILE_DIR'], app.config['PROFILE_MAX_ENTRIES'])
     
     # Initialize MongoDB
     init_mongo(app)
@@ -33,7 +48,8 @@ def create_app():
                 "http://127.0.0.1:3000",
             ],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Profile-Token"],
+            "expose_headers": ["X-Profile-Id"],
             "supports_credentials": True
         }
     })
@@ -41,11 +57,13 @@ def create_app():
     # Register blueprints
     app.register_blueprint(auth_blueprint, url_prefix='/api')
     app.register_blueprint(connections_bp, url_prefix='/api')
+    app.register_blueprint(profiling_bp, url_prefix='/api')
 
     @app.after_request
     def after_request(response):
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:5173')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,X-Profile-Token')
+        response.headers.add('Access-Control-Expose-Headers', 'X-Profile-Id')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
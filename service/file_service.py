@@ -1,6 +1,7 @@
 import cloudinary
 import cloudinary.uploader
 from config.cloudinary_config import CLOUDINARY_CONFIG
+from utils.profiler import profile_span
 from datetime import datetime
 from bson import ObjectId
 
@@ -12,11 +13,12 @@ class FileService:
     def upload_file(self, file, sender_email, receiver_email):
         try:
             # Upload file to Cloudinary
-            upload_result = cloudinary.uploader.upload(
-                file,
-                folder='file_sharing',
-                resource_type='auto'
-            )
+            with profile_span('cloudinary'):
+                upload_result = cloudinary.uploader.upload(
+                    file,
+                    folder='file_sharing',
+                    resource_type='auto'
+                )
 
             # Store file metadata in database
             file_metadata = {
@@ -63,7 +65,8 @@ class FileService:
                 raise Exception("Unauthorized to delete this file")
 
             # Delete from Cloudinary
-            cloudinary.uploader.destroy(file_metadata['cloudinary_public_id'])
+            with profile_span('cloudinary'):
+                cloudinary.uploader.destroy(file_metadata['cloudinary_public_id'])
 
             # Delete from database
             self.db.files.delete_one({'_id': ObjectId(file_id)})
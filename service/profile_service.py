@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import time
+
+PROFILE_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+class ProfileStore:
+    def __init__(self, directory, max_entries=100):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def save(self, metadata, folded_stacks):
+        """Write a captured profile and drop the oldest ones beyond max_entries.
+
+        Saves are serialized by the profiler's single writer thread.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Prefix with the capture time so a plain sort returns oldest first
+        name = f"{int(time.time() * 1000):015d}-{metadata['id']}"
+        path = os.path.join(self.directory, name)
+
+        # Write to temporary names and rename into place so a failed write
+        # never leaves half a profile behind
+        try:
+            with open(path + '.folded.tmp', 'w') as f:
+                f.write(folded_stacks)
+            with open(path + '.json.tmp', 'w') as f:
+                json.dump(metadata, f)
+            os.replace(path + '.folded.tmp', path + '.folded')
+            os.replace(path + '.json.tmp', path + '.json')
+        finally:
+            for tmp in (path + '.folded.tmp', path + '.json.tmp'):
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+        names = self._names()
+        stale = set(names[:max(len(names) - self.max_entries, 0)])
+        # Also sweep stack files whose metadata never made it to disk
+        stale.update(f[:-len('.folded')] for f in os.listdir(self.directory)
+                     if f.endswith('.folded') and f[:-len('.folded')] not in names)
+        for old in stale:
+            for ext in ('.json', '.folded'):
+                try:
+                    os.remove(os.path.join(self.directory, old + ext))
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self):
+        """List stored profile metadata, newest first, without the query lists"""
+        profiles = []
+        for name in reversed(self._names()):
+            metadata = self._read_metadata(name)
+            if metadata:
+                metadata.pop('queries', None)
+                profiles.append(metadata)
+        return profiles
+
+    def get_profile(self, profile_id):
+        """Get full metadata for a profile"""
+        name = self._find(profile_id)
+        return self._read_metadata(name) if name else None
+
+    def get_folded_stacks(self, profile_id):
+        """Get the folded stacks of a profile for flamegraph tools"""
+        name = self._find(profile_id)
+        if not name:
+            return None
+        try:
+            with open(os.path.join(self.directory, name + '.folded')) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _names(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(f[:-len('.json')] for f in os.listdir(self.directory) if f.endswith('.json'))
+
+    def _find(self, profile_id):
+        if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+            return None
+        for name in self._names():
+            if name.endswith('-' + profile_id):
+                return name
+        return None
+
+    def _read_metadata(self, name):
+        try:
+            with open(os.path.join(self.directory, name + '.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
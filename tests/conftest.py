@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.profiling import profiling_bp
+from service.profile_service import ProfileStore
+from utils import profiler
+from utils.profiler import init_profiler, profile_span
+from utils.security import hash_password
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        PROFILE_ADMIN_SECRET='test-secret',
+        PROFILE_SAMPLE_RATE=0,
+        PROFILE_SAMPLE_INTERVAL_MS=1,
+        PROFILE_SLOW_THRESHOLD_MS=50,
+    )
+    init_profiler(app)
+    app.profile_store = ProfileStore(str(tmp_path / 'profiles'), max_entries=5)
+    app.register_blueprint(profiling_bp, url_prefix='/api')
+
+    @app.route('/slow')
+    def slow():
+        hash_password('password')
+        with profile_span('cloudinary'):
+            time.sleep(0.06)
+        return jsonify({'message': 'done'}), 200
+
+    @app.route('/fast')
+    def fast():
+        return jsonify({'message': 'done'}), 200
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def wait_for_saves():
+    """Wait for the profiler's background writer to store every queued profile"""
+    return profiler._pending_saves.join
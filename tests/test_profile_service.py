@@ -0,0 +1,58 @@
+import pytest
+
+from service.profile_service import ProfileStore
+
+
+def _save(store, profile_id):
+    store.save({'id': profile_id, 'path': '/api/status', 'queries': [{'command': 'find'}]}, 'main;handler 3')
+
+
+def test_save_and_read_back(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    _save(store, 'a' * 32)
+
+    assert store.get_profile('a' * 32)['queries'] == [{'command': 'find'}]
+    assert store.get_folded_stacks('a' * 32) == 'main;handler 3'
+    assert 'queries' not in store.list_profiles()[0]
+
+
+def test_oldest_profiles_are_evicted(tmp_path):
+    store = ProfileStore(str(tmp_path), max_entries=3)
+    ids = [f"{i:032x}" for i in range(5)]
+    for profile_id in ids:
+        _save(store, profile_id)
+
+    assert [p['id'] for p in store.list_profiles()] == ids[:1:-1]
+    assert store.get_profile(ids[0]) is None
+    assert len(list(tmp_path.iterdir())) == 6
+
+
+def test_invalid_ids_are_not_looked_up(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    _save(store, 'a' * 32)
+
+    for profile_id in ['../' + 'a' * 29, 'a' * 31, 'A' * 32, 'a' * 32 + '\n']:
+        assert store.get_profile(profile_id) is None
+        assert store.get_folded_stacks(profile_id) is None
+
+
+def test_empty_store(tmp_path):
+    store = ProfileStore(str(tmp_path / 'missing'))
+    assert store.list_profiles() == []
+    assert store.get_profile('a' * 32) is None
+
+
+def test_failed_save_leaves_no_files(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    with pytest.raises(TypeError):
+        store.save({'id': 'a' * 32, 'bad': object()}, 'main 1')
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_orphaned_stack_files_are_evicted(tmp_path):
+    (tmp_path / ('0' * 15 + '-' + 'b' * 32 + '.folded')).write_text('main 1')
+    store = ProfileStore(str(tmp_path))
+    _save(store, 'a' * 32)
+
+    assert sorted(f.suffix for f in tmp_path.iterdir()) == ['.folded', '.json']
@@ -0,0 +1,133 @@
+import pytest
+
+from utils import profiler
+from utils.profiler import sign_profile_token, verify_profile_token
+
+
+def test_signed_token_verifies():
+    assert verify_profile_token('secret', sign_profile_token('secret'))
+
+
+def test_token_signed_with_other_secret_is_rejected():
+    assert not verify_profile_token('secret', sign_profile_token('other'))
+
+
+def test_expired_token_is_rejected():
+    assert not verify_profile_token('secret', sign_profile_token('secret', ttl=-10))
+
+
+def test_token_is_rejected_without_secret():
+    assert not verify_profile_token(None, sign_profile_token('secret'))
+
+
+@pytest.mark.parametrize('token', [
+    None,
+    '',
+    'no-dot',
+    '².abc',
+    '9' * 5000 + '.abc',
+    '9999999999.é',
+    '9999999999.' + 'g' * 64,
+    '9999999999.' + 'a' * 64 + '\n',
+])
+def test_malformed_token_is_rejected(token):
+    assert not verify_profile_token('secret', token)
+
+
+def test_malformed_token_header_does_not_break_requests(client):
+    response = client.get('/fast', headers={'X-Profile-Token': '².abc'.encode('utf-8')})
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+
+
+def test_admin_profiles_requires_token(client):
+    assert client.get('/api/admin/profiles').status_code == 403
+    bad = {'X-Profile-Token': sign_profile_token('wrong')}
+    assert client.get('/api/admin/profiles', headers=bad).status_code == 403
+
+
+def test_admin_preflight_does_not_require_token(client):
+    assert client.options('/api/admin/profiles').status_code == 200
+
+
+def test_fast_request_is_not_stored(app, client, wait_for_saves):
+    client.get('/fast')
+    wait_for_saves()
+    assert app.profile_store.list_profiles() == []
+
+
+def test_slow_request_is_stored_with_breakdown(app, client, wait_for_saves):
+    assert client.get('/slow').status_code == 200
+    wait_for_saves()
+
+    headers = {'X-Profile-Token': sign_profile_token(app.config['PROFILE_ADMIN_SECRET'])}
+    profiles = client.get('/api/admin/profiles', headers=headers).get_json()['profiles']
+    assert len(profiles) == 1
+    profile = profiles[0]
+    assert profile['path'] == '/slow'
+    assert profile['duration_ms'] >= 50
+    assert not profile['forced']
+    assert profile['breakdown']['cloudinary']['count'] == 1
+    assert profile['breakdown']['password_hash']['count'] == 1
+
+
+def test_unsampled_slow_request_has_no_flamegraph(app, client, wait_for_saves):
+    client.get('/slow')
+    wait_for_saves()
+
+    headers = {'X-Profile-Token': sign_profile_token(app.config['PROFILE_ADMIN_SECRET'])}
+    profile = client.get('/api/admin/profiles', headers=headers).get_json()['profiles'][0]
+    assert not profile['sampled']
+
+    response = client.get(f"/api/admin/profiles/{profile['id']}/flamegraph", headers=headers)
+    assert response.status_code == 409
+
+
+def test_forced_request_returns_id_and_flamegraph(app, client, wait_for_saves):
+    headers = {'X-Profile-Token': sign_profile_token(app.config['PROFILE_ADMIN_SECRET'])}
+    response = client.get('/slow', headers=headers)
+    profile_id = response.headers['X-Profile-Id']
+    wait_for_saves()
+
+    profile = client.get(f'/api/admin/profiles/{profile_id}', headers=headers).get_json()
+    assert profile['forced'] and profile['sampled']
+    assert profile['queries'] == []
+
+    flamegraph = client.get(f'/api/admin/profiles/{profile_id}/flamegraph', headers=headers)
+    assert flamegraph.status_code == 200
+    assert 'slow (conftest.py:' in flamegraph.get_data(as_text=True)
+
+
+def test_unknown_profile_returns_404(app, client):
+    headers = {'X-Profile-Token': sign_profile_token(app.config['PROFILE_ADMIN_SECRET'])}
+    assert client.get('/api/admin/profiles/' + 'a' * 32, headers=headers).status_code == 404
+    assert client.get('/api/admin/profiles/not-an-id/flamegraph', headers=headers).status_code == 404
+
+
+def test_writer_survives_failed_save(app, client, monkeypatch, wait_for_saves):
+    save = app.profile_store.save
+    calls = []
+
+    def failing_once(metadata, folded_stacks):
+        calls.append(metadata['id'])
+        if len(calls) == 1:
+            raise TypeError('not JSON serializable')
+        save(metadata, folded_stacks)
+
+    monkeypatch.setattr(app.profile_store, 'save', failing_once)
+    client.get('/slow')
+    client.get('/slow')
+    wait_for_saves()
+
+    assert len(calls) == 2
+    assert len(app.profile_store.list_profiles()) == 1
+
+
+def test_full_queue_drops_profile(app, client, monkeypatch, caplog):
+    def full(item):
+        raise profiler._queue.Full
+
+    monkeypatch.setattr(profiler._pending_saves, 'put_nowait', full)
+
+    assert client.get('/slow').status_code == 200
+    assert 'Dropping profile' in caplog.text
@@ -0,0 +1,305 @@
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, request, has_request_context
+from pymongo import monitoring
+
+try:
+    # Under gunicorn's eventlet worker every request is a greenlet on one OS
+    # thread. The sampler and the profile writer run as unpatched OS threads
+    # so they keep running while the hub is busy; the request itself is
+    # identified by its greenlet rather than its thread.
+    import greenlet
+    from eventlet.patcher import original, is_monkey_patched
+    _queue = original('queue')
+    _thread = original('_thread')
+    _threading = original('threading')
+except ImportError:
+    greenlet = None
+    import queue as _queue
+    import _thread
+    import threading as _threading
+
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+TOKEN_EXPIRY_PATTERN = re.compile(r'[0-9]{1,12}')
+TOKEN_SIGNATURE_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+def sign_profile_token(secret, ttl=300):
+    """Create an admin token of the form '<expiry>.<hmac>' valid for ttl seconds"""
+    expires = str(int(time.time()) + ttl)
+    signature = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(secret, token):
+    """Check an admin token produced by sign_profile_token"""
+    if not secret or not token or '.' not in token:
+        return False
+
+    expires, signature = token.split('.', 1)
+    if not TOKEN_EXPIRY_PATTERN.fullmatch(expires) or not TOKEN_SIGNATURE_PATTERN.fullmatch(signature):
+        return False
+    if int(expires) < time.time():
+        return False
+
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected.encode(), signature.encode())
+
+
+def _is_green():
+    return greenlet is not None and is_monkey_patched('thread')
+
+
+class StackSampler:
+    """Periodically sample the call stack of the request that created it"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = Counter()
+        self.thread_id = _thread.get_ident()
+        self.greenlet = greenlet.getcurrent() if _is_green() else None
+        self._lock = _threading.Lock()
+        self._stop = _threading.Event()
+
+    def start(self):
+        _threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        """Signal the sampler to exit; it finishes on its own without a join"""
+        self._stop.set()
+
+    def _current_frame(self):
+        if self.greenlet is None:
+            return sys._current_frames().get(self.thread_id)
+
+        # A suspended greenlet exposes where it is waiting (e.g. on Mongo or
+        # Cloudinary I/O) through gr_frame. It is None while the greenlet is
+        # running, in which case the OS thread's frame belongs to it.
+        frame = self.greenlet.gr_frame
+        if frame is not None or self.greenlet.dead:
+            return frame
+        frame = sys._current_frames().get(self.thread_id)
+        # Drop the sample if the request switched out while we were reading
+        return frame if self.greenlet.gr_frame is None else None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = self._current_frame()
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            with self._lock:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        """Return the samples in the folded-stack format used by flamegraph.pl and speedscope"""
+        with self._lock:
+            samples = self.samples.most_common()
+        return '\n'.join(f"{stack} {count}" for stack, count in samples)
+
+
+class RequestProfile:
+    """Timing data collected for a single request"""
+
+    def __init__(self, forced=False):
+        self.id = uuid.uuid4().hex
+        self.forced = forced
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.breakdown = {}
+        self.queries = []
+        self.pending_queries = {}
+        self.sampler = None
+        self.finished = False
+
+    def add_time(self, category, seconds):
+        entry = self.breakdown.setdefault(category, {'count': 0, 'total_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += seconds * 1000
+
+
+def current_profile():
+    """Get the profile of the active request, if any"""
+    if not has_request_context():
+        return None
+    return g.get('profile')
+
+
+@contextmanager
+def profile_span(category):
+    """Add the time spent in the block to the active request's breakdown"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_time(category, time.perf_counter() - start)
+
+
+def timed(category):
+    """Decorator form of profile_span"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_span(category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Record the Mongo commands issued while handling a request"""
+
+    def started(self, event):
+        profile = current_profile()
+        if profile is None:
+            return
+
+        # Succeeded/failed events do not carry the command, so keep the collection name until then
+        collection = event.command.get(event.command_name)
+        profile.pending_queries[event.request_id] = collection if isinstance(collection, str) else None
+
+    def succeeded(self, event):
+        self._record(event, True)
+
+    def failed(self, event):
+        self._record(event, False)
+
+    def _record(self, event, ok):
+        profile = current_profile()
+        if profile is None:
+            return
+
+        seconds = event.duration_micros / 1e6
+        profile.add_time('mongo', seconds)
+        # Only the command and collection names are kept; query bodies may contain credentials
+        profile.queries.append({
+            'command': event.command_name,
+            'database': event.database_name,
+            'collection': profile.pending_queries.pop(event.request_id, None),
+            'duration_ms': round(seconds * 1000, 3),
+            'ok': ok
+        })
+
+
+# pymongo listeners are global, so register a single one however many apps are created
+_mongo_listener = MongoCommandListener()
+_mongo_listener_registered = False
+
+# Profiles are written by one background OS thread so slow requests do not
+# also pay for the disk I/O of being recorded. The queue is bounded so a slow
+# disk drops profiles instead of piling them up in memory.
+PENDING_SAVES_MAX = 50
+_pending_saves = _queue.Queue(maxsize=PENDING_SAVES_MAX)
+_writer_lock = _threading.Lock()
+_writer_started = False
+
+
+def _write_profiles():
+    while True:
+        app, metadata, sampler = _pending_saves.get()
+        try:
+            app.profile_store.save(metadata, sampler.folded() if sampler else '')
+        except Exception:
+            # Keep the writer alive; it is never restarted once started
+            app.logger.exception(f"Could not store profile {metadata['id']}")
+        finally:
+            _pending_saves.task_done()
+
+
+def _queue_save(app, metadata, sampler):
+    global _writer_started
+    with _writer_lock:
+        if not _writer_started:
+            _threading.Thread(target=_write_profiles, daemon=True).start()
+            _writer_started = True
+    try:
+        _pending_saves.put_nowait((app, metadata, sampler))
+    except _queue.Full:
+        app.logger.warning(f"Dropping profile {metadata['id']}: {PENDING_SAVES_MAX} profiles already waiting to be written")
+
+
+def init_profiler(app):
+    """Register the profiling hooks; call before any Mongo client is created"""
+    global _mongo_listener_registered
+    if not _mongo_listener_registered:
+        monitoring.register(_mongo_listener)
+        _mongo_listener_registered = True
+
+    @app.before_request
+    def start_profile():
+        if request.blueprint == 'profiling':
+            return
+
+        forced = verify_profile_token(
+            app.config.get('PROFILE_ADMIN_SECRET'),
+            request.headers.get(PROFILE_TOKEN_HEADER)
+        )
+        profile = RequestProfile(forced=forced)
+
+        if forced or random.random() < app.config.get('PROFILE_SAMPLE_RATE', 0):
+            profile.sampler = StackSampler(app.config.get('PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000)
+            profile.sampler.start()
+
+        g.profile = profile
+
+    @app.after_request
+    def finish_profile(response):
+        profile = _finish(app)
+        if profile is not None and profile.forced:
+            response.headers[PROFILE_ID_HEADER] = profile.id
+        return response
+
+    @app.teardown_request
+    def teardown_profile(exc):
+        _finish(app)
+
+
+def _finish(app):
+    """Stop the sampler and queue the profile for storage if it was forced or slow"""
+    profile = current_profile()
+    if profile is None or profile.finished:
+        return profile
+    profile.finished = True
+
+    duration_ms = (time.perf_counter() - profile.start) * 1000
+    if profile.sampler:
+        profile.sampler.stop()
+
+    if not profile.forced and duration_ms < app.config.get('PROFILE_SLOW_THRESHOLD_MS', 1000):
+        return profile
+
+    _queue_save(app, {
+        'id': profile.id,
+        'method': request.method,
+        'path': request.path,
+        'started_at': profile.started_at,
+        'duration_ms': round(duration_ms, 3),
+        'forced': profile.forced,
+        'sampled': profile.sampler is not None,
+        'breakdown': profile.breakdown,
+        'queries': profile.queries
+    }, profile.sampler)
+
+    return profile
@@ -1,8 +1,11 @@
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.profiler import timed
 
+@timed('password_hash')
 def hash_password(password):
     return generate_password_hash(password)
 
+@timed('password_hash')
 def check_password(hash, password):
     return check_password_hash(hash, password)
 